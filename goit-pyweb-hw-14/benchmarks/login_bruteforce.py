@@ -0,0 +1,82 @@
+"""
+Сравнивает процессорное время на обработку атаки перебором паролей на /login
+без защиты и с LoginAttemptTracker.
+
+Атакующий отправляет --rate запросов в секунду. Время для трекера
+моделируется, поэтому блокировки истекают так же, как при реальной атаке
+растянутой во времени, а проверки bcrypt после истечения блокировок
+попадают в замер. При --rate 0 все попытки приходят одновременно:
+ни одна блокировка не истекает, это лучший для защиты случай.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.login_bruteforce --attempts 2000 --rate 20
+"""
+import argparse
+import random
+import time
+
+from passlib.context import CryptContext
+
+from login_guard import LoginAttemptTracker
+
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class SimulatedClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def simulate(attempts, hashed_password, rate, clock, tracker=None, usernames=1, ips=1):
+    """
+    Прогоняет attempts неверных попыток входа с частотой rate в секунду
+    и возвращает процессорное время, количество проверок bcrypt и количество
+    отклонённых запросов.
+    """
+    rng = random.Random(0)
+    hashed = rejected = 0
+    start = time.process_time()
+    for i in range(attempts):
+        if rate:
+            clock.now = i / rate
+        username = f"victim{rng.randrange(usernames)}"
+        ip_number = rng.randrange(ips)
+        ip = f"10.0.{ip_number // 256}.{ip_number % 256}"
+        if tracker is not None and tracker.retry_after(username, ip) > 0:
+            rejected += 1
+            continue
+        pwd_context.verify(f"guess{i}", hashed_password)
+        hashed += 1
+        if tracker is not None:
+            tracker.register_failure(username, ip)
+    return time.process_time() - start, hashed, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--attempts", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=20.0, help="попыток в секунду, 0 - все сразу")
+    args = parser.parse_args()
+
+    hashed_password = pwd_context.hash("correct horse battery staple")
+    scenarios = [
+        ("one user, one ip", {"usernames": 1, "ips": 1}),
+        ("one user, many ips", {"usernames": 1, "ips": 1000}),
+        ("many users, one ip", {"usernames": 1000, "ips": 1}),
+    ]
+    print(f"{'scenario':<22}{'guard':<8}{'cpu, s':>10}{'bcrypt':>10}{'rejected':>10}")
+    for name, options in scenarios:
+        for label in ("off", "on"):
+            clock = SimulatedClock()
+            tracker = LoginAttemptTracker(clock=clock) if label == "on" else None
+            cpu, hashed, rejected = simulate(args.attempts, hashed_password, args.rate, clock, tracker, **options)
+            print(f"{name:<22}{label:<8}{cpu:>10.2f}{hashed:>10}{rejected:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+COALESCE_WAIT_TIMEOUT = 5.0
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+def normalize_params(params: Dict[str, Any]) -> Tuple:
+    """
+    Приводит параметры запроса к каноническому виду для ключа объединения.
+
+    Параметры со значением None отбрасываются, порядок параметров
+    не учитывается. Остальные значения входят в ключ как есть: запросы
+    с разными значениями выполняют разные запросы к базе данных и не
+    должны получать общий результат.
+
+    Args:
+        params (Dict[str, Any]): Параметры запроса.
+
+    Returns:
+        Tuple: Отсортированные пары (имя, значение).
+    """
+    normalized = []
+    for name, value in params.items():
+        if value is None:
+            continue
+        normalized.append((name, value))
+    return tuple(sorted(normalized))
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные одинаковые запросы на чтение.
+
+    Первый запрос с данным ключом выполняет функцию, остальные ждут его
+    результат не дольше wait_timeout секунд. Если ожидание истекло, запрос
+    выполняет функцию самостоятельно. Результат не кэшируется: после
+    завершения запроса следующий вызов снова обращается к базе данных.
+    """
+
+    def __init__(self, wait_timeout: float = COALESCE_WAIT_TIMEOUT):
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.shared = 0
+        self.timeouts = 0
+
+    def do(self, user_id: int, route: str, params: Dict[str, Any], fn: Callable[[], Any]):
+        """
+        Выполняет fn или присоединяется к уже выполняющемуся одинаковому запросу.
+
+        Args:
+            user_id (int): ID пользователя.
+            route (str): Имя маршрута.
+            params (Dict[str, Any]): Параметры запроса.
+            fn (Callable[[], Any]): Функция, выполняющая запрос к базе данных.
+
+        Raises:
+            Exception: Исключение, выброшенное fn у выполнявшего запрос.
+
+        Returns:
+            Any: Результат fn.
+        """
+        key = (user_id, route, normalize_params(params))
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if call.done.wait(self.wait_timeout):
+                with self._lock:
+                    self.shared += 1
+                if call.error is not None:
+                    raise call.error
+                return call.result
+            with self._lock:
+                self.timeouts += 1
+                self.executed += 1
+            return fn()
+
+        try:
+            call.result = fn()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                self.executed += 1
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Возвращает счётчики объединения запросов.
+
+        Returns:
+            Dict[str, float]: Количество выполненных и разделённых запросов,
+            истёкших ожиданий и доля запросов, получивших чужой результат.
+        """
+        with self._lock:
+            total = self.executed + self.shared
+            return {
+                "executed": self.executed,
+                "shared": self.shared,
+                "timeouts": self.timeouts,
+                "share_ratio": self.shared / total if total else 0.0,
+            }
+
+
+coalescer = SingleFlight()
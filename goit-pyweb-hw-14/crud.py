@@ -1,3 +1,8 @@
+from calendar import isleap
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import extract, tuple_
 from sqlalchemy.orm import Session
 from models import Contact, User
 from schemas import ContactCreate, ContactUpdate
@@ -94,6 +99,30 @@ def get_contact(db: Session, contact_id: int, user_id: int):
     """
     return db.query(Contact).filter(Contact.id == contact_id, Contact.user_id == user_id).first()
 
+def get_contacts_by_ids(db: Session, contact_ids: List[int], user_id: int, chunk_size: int = 1000):
+    """
+    Получает контакты пользователя по списку ID, выполняя запрос частями.
+    
+    Args:
+        db (Session): Сессия базы данных.
+        contact_ids (List[int]): ID контактов в нужном порядке.
+        user_id (int): ID пользователя.
+        chunk_size (int, optional): Количество ID в одном запросе. По умолчанию 1000.
+
+    Returns:
+        Tuple[List[Contact], List[int]]: Найденные контакты в порядке запроса
+        и ID, которые не найдены или не принадлежат пользователю.
+    """
+    ordered_ids = list(dict.fromkeys(contact_ids))
+    found = {}
+    for start in range(0, len(ordered_ids), chunk_size):
+        chunk = ordered_ids[start:start + chunk_size]
+        for contact in db.query(Contact).filter(Contact.user_id == user_id, Contact.id.in_(chunk)):
+            found[contact.id] = contact
+    contacts = [found[contact_id] for contact_id in ordered_ids if contact_id in found]
+    missing = [contact_id for contact_id in ordered_ids if contact_id not in found]
+    return contacts, missing
+
 def get_contacts(db: Session, user_id: int, skip: int = 0, limit: int = 10):
     """
     Получает список контактов для данного пользователя с возможностью пагинации.
@@ -109,6 +138,70 @@ def get_contacts(db: Session, user_id: int, skip: int = 0, limit: int = 10):
     """
     return db.query(Contact).filter(Contact.user_id == user_id).offset(skip).limit(limit).all()
 
+def search_contacts(db: Session, user_id: int, name: Optional[str] = None, surname: Optional[str] = None, email: Optional[str] = None):
+    """
+    Ищет контакты пользователя по имени, фамилии или email.
+    
+    Args:
+        db (Session): Сессия базы данных.
+        user_id (int): ID пользователя.
+        name (str, optional): Часть имени.
+        surname (str, optional): Часть фамилии.
+        email (str, optional): Часть email.
+
+    Returns:
+        List[Contact]: Список найденных контактов.
+    """
+    query = db.query(Contact).filter(Contact.user_id == user_id)
+    if name:
+        query = query.filter(Contact.first_name.ilike(f"%{name}%"))
+    if surname:
+        query = query.filter(Contact.last_name.ilike(f"%{surname}%"))
+    if email:
+        query = query.filter(Contact.email.ilike(f"%{email}%"))
+    return query.all()
+
+def upcoming_month_days(today: date, days: int = 7) -> List[Tuple[int, int]]:
+    """
+    Возвращает пары (месяц, день) для ближайших дней, начиная с сегодняшнего.
+
+    Args:
+        today (date): Дата, от которой ведётся отсчёт.
+        days (int, optional): Количество дней в окне. По умолчанию 7.
+
+    Returns:
+        List[Tuple[int, int]]: Пары (месяц, день). В невисокосный год 29 февраля
+        добавляется вместе с 28 февраля, чтобы такие дни рождения не терялись.
+    """
+    pairs = []
+    for offset in range(days + 1):
+        day = today + timedelta(days=offset)
+        pairs.append((day.month, day.day))
+        if day.month == 2 and day.day == 28 and not isleap(day.year):
+            pairs.append((2, 29))
+    return pairs
+
+def get_upcoming_birthdays(db: Session, user_id: int, today: date, days: int = 7):
+    """
+    Получает контакты пользователя, у которых день рождения (месяц и день,
+    без учёта года рождения) наступает в ближайшие дни.
+    
+    Args:
+        db (Session): Сессия базы данных.
+        user_id (int): ID пользователя.
+        today (date): Дата, от которой ведётся отсчёт.
+        days (int, optional): Количество дней в окне. По умолчанию 7.
+
+    Returns:
+        List[Contact]: Список контактов.
+    """
+    return db.query(Contact).filter(
+        Contact.user_id == user_id,
+        tuple_(extract("month", Contact.birthday), extract("day", Contact.birthday)).in_(
+            upcoming_month_days(today, days)
+        )
+    ).all()
+
 def update_contact(db: Session, contact_id: int, contact: ContactUpdate, user_id: int):
     """
     Обновляет существующий контакт в базе данных.
@@ -0,0 +1,172 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+
+USERNAME_THRESHOLD = 5
+IP_THRESHOLD = 20
+BASE_DELAY = 1.0
+MAX_DELAY = 15 * 60.0
+FAILURE_WINDOW = 15 * 60.0
+MAX_ENTRIES = 100_000
+
+
+def backoff_delay(failures: int, threshold: int, base_delay: float = BASE_DELAY, max_delay: float = MAX_DELAY) -> float:
+    """
+    Вычисляет время блокировки после очередной неудачной попытки входа.
+
+    Args:
+        failures (int): Количество неудачных попыток подряд.
+        threshold (int): Количество попыток, допустимых без блокировки.
+        base_delay (float, optional): Блокировка после первого превышения порога, в секундах.
+        max_delay (float, optional): Максимальная блокировка, в секундах.
+
+    Returns:
+        float: Время блокировки в секундах, удваивается с каждой попыткой сверх порога.
+    """
+    if failures < threshold:
+        return 0.0
+    return min(base_delay * 2 ** (failures - threshold), max_delay)
+
+
+class LoginAttemptTracker:
+    """
+    Учитывает неудачные попытки входа по имени пользователя и IP-адресу в памяти.
+
+    Проверка выполняется до поиска пользователя и хеширования пароля, поэтому
+    заблокированные запросы не тратят процессорное время на bcrypt.
+    Количество записей ограничено max_entries. При переполнении сначала
+    вытесняются самые старые незаблокированные записи, чтобы поток
+    одноразовых ключей не снял действующую блокировку.
+    """
+
+    def __init__(
+        self,
+        username_threshold: int = USERNAME_THRESHOLD,
+        ip_threshold: int = IP_THRESHOLD,
+        window: float = FAILURE_WINDOW,
+        max_entries: int = MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.thresholds = {"user": username_threshold, "ip": ip_threshold}
+        self.window = window
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+        # Незаблокированные и заблокированные записи хранятся в разных очередях,
+        # поэтому вытеснение всегда берёт первую запись нужной очереди.
+        self._open: "OrderedDict[Tuple[str, str], list]" = OrderedDict()
+        self._blocked: "OrderedDict[Tuple[str, str], list]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._open) + len(self._blocked)
+
+    def _keys(self, username: str, ip: Optional[str]):
+        keys = [("user", username.strip().lower())]
+        if ip:
+            keys.append(("ip", ip))
+        return keys
+
+    def retry_after(self, username: str, ip: Optional[str]) -> float:
+        """
+        Возвращает, сколько секунд осталось до снятия блокировки.
+
+        Args:
+            username (str): Имя пользователя из формы входа.
+            ip (str, optional): IP-адрес клиента.
+
+        Returns:
+            float: 0, если попытка разрешена, иначе время ожидания в секундах.
+        """
+        now = self.clock()
+        wait = 0.0
+        with self._lock:
+            for key in self._keys(username, ip):
+                entry = self._open.get(key) or self._blocked.get(key)
+                if entry is not None:
+                    wait = max(wait, entry[1] - now)
+        return wait
+
+    def register_failure(self, username: str, ip: Optional[str]):
+        """
+        Учитывает неудачную попытку входа и при превышении порога блокирует ключ.
+
+        Args:
+            username (str): Имя пользователя из формы входа.
+            ip (str, optional): IP-адрес клиента.
+        """
+        now = self.clock()
+        with self._lock:
+            for key in self._keys(username, ip):
+                entry = self._open.pop(key, None) or self._blocked.pop(key, None)
+                if entry is None or now - entry[2] > self.window:
+                    entry = [0, 0.0, now]
+                entry[0] += 1
+                entry[1] = now + backoff_delay(entry[0], self.thresholds[key[0]])
+                entry[2] = now
+                queue = self._blocked if entry[1] > now else self._open
+                queue[key] = entry
+            self._evict()
+
+    def _evict(self):
+        """
+        Вытесняет записи сверх max_entries: сначала самые старые
+        незаблокированные, а если таких нет, самые старые заблокированные.
+        Каждое вытеснение занимает O(1).
+        """
+        while len(self) > self.max_entries:
+            (self._open or self._blocked).popitem(last=False)
+
+    def reset(self, username: str, ip: Optional[str]):
+        """
+        Сбрасывает счётчик попыток для имени пользователя после успешного входа.
+
+        Args:
+            username (str): Имя пользователя из формы входа.
+            ip (str, optional): IP-адрес клиента. Счётчик IP не сбрасывается,
+                чтобы один известный пароль не обнулял перебор с того же адреса.
+        """
+        key = self._keys(username, ip)[0]
+        with self._lock:
+            self._open.pop(key, None)
+            self._blocked.pop(key, None)
+
+
+class RedisLoginAttemptTracker(LoginAttemptTracker):
+    """
+    Учитывает неудачные попытки входа в Redis, чтобы счётчики были общими
+    для всех экземпляров API. Записи истекают через window секунд, поэтому
+    объём памяти ограничен самим Redis.
+    """
+
+    def __init__(self, redis, prefix: str = "login", **kwargs):
+        super().__init__(**kwargs)
+        self.redis = redis
+        self.prefix = prefix
+
+    def _redis_key(self, key: Tuple[str, str], suffix: str) -> str:
+        return f"{self.prefix}:{key[0]}:{key[1]}:{suffix}"
+
+    def retry_after(self, username: str, ip: Optional[str]) -> float:
+        wait = 0.0
+        for key in self._keys(username, ip):
+            ttl = self.redis.pttl(self._redis_key(key, "blocked"))
+            if ttl and ttl > 0:
+                wait = max(wait, ttl / 1000)
+        return wait
+
+    def register_failure(self, username: str, ip: Optional[str]):
+        for key in self._keys(username, ip):
+            failures_key = self._redis_key(key, "failures")
+            pipe = self.redis.pipeline()
+            pipe.incr(failures_key)
+            pipe.expire(failures_key, int(self.window))
+            failures = pipe.execute()[0]
+            delay = backoff_delay(failures, self.thresholds[key[0]])
+            if delay:
+                self.redis.set(self._redis_key(key, "blocked"), 1, px=int(delay * 1000))
+
+    def reset(self, username: str, ip: Optional[str]):
+        key = self._keys(username, ip)[0]
+        self.redis.delete(self._redis_key(key, "failures"), self._redis_key(key, "blocked"))
@@ -1,9 +1,9 @@
-from fastapi import FastAPI, Depends, HTTPException, status, APIRouter, File, UploadFile, BackgroundTasks
+from fastapi import FastAPI, Depends, HTTPException, status, APIRouter, File, UploadFile, BackgroundTasks, Request
 from sqlalchemy.orm import Session
 import crud
 import models
 import db
-from schemas import Contact, ContactCreate
+from schemas import Contact, ContactCreate, ContactBatchRequest, ContactBatchResponse
 from typing import List, Optional
 from datetime import datetime, timedelta
 from auth import verify_token, create_access_token, create_refresh_token
@@ -24,12 +24,16 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from dotenv import load_dotenv
 import os
+import asyncio
+
+from scheduler import run_birthday_digest_scheduler
+from coalesce import coalescer
+from login_guard import LoginAttemptTracker, RedisLoginAttemptTracker
 
 redis = Redis(host="localhost", port=6379, db=0)
 FastAPILimiter.init(redis)
 
 load_dotenv()
-models.Base.metadata.create_all(bind=db.engine)
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -37,6 +41,8 @@ CLOUD_NAME = os.getenv("CLOUD_NAME")
 API_KEY = os.getenv("API_KEY")
 API_SECRET = os.getenv("API_SECRET")
 
+login_guard = RedisLoginAttemptTracker(redis) if os.getenv("LOGIN_GUARD_REDIS") else LoginAttemptTracker()
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], 
@@ -79,11 +85,24 @@ def read_contact(contact_id: int, db: Session = Depends(db.get_db), current_user
     Проверяет, что контакт принадлежит текущему пользователю.
     Если контакт не найден или пользователь не авторизован, вызывает ошибку 404.
     """
-    db_contact = crud.get_contact(db, contact_id=contact_id)
-    if db_contact is None or db_contact.user_id != current_user.id:
+    db_contact = coalescer.do(
+        current_user.id, "read_contact", {"contact_id": contact_id},
+        lambda: _to_schema(crud.get_contact(db, contact_id=contact_id, user_id=current_user.id)),
+    )
+    if db_contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
     return db_contact
 
+@app.post("/contacts/batch", response_model=ContactBatchResponse)
+def read_contacts_batch(body: ContactBatchRequest, db: Session = Depends(db.get_db), current_user: User = Depends(get_current_user)):
+    """
+    Получает несколько контактов текущего пользователя по списку ID за один запрос.
+    Принимает до 5000 ID, возвращает найденные контакты в порядке запроса
+    и список ID, которые не найдены или не принадлежат пользователю.
+    """
+    contacts, missing = crud.get_contacts_by_ids(db, contact_ids=body.ids, user_id=current_user.id)
+    return {"contacts": contacts, "missing": missing}
+
 def update_contact(contact_id: int, contact: ContactCreate, db: Session = Depends(db.get_db), current_user: User = Depends(get_current_user)):
     """
     Обновляет информацию о контакте с указанным contact_id.
@@ -111,44 +130,56 @@ def search_contacts(
     name: Optional[str] = None,
     surname: Optional[str] = None,
     email: Optional[str] = None,
-    db: Session = Depends(db.get_db)
+    db: Session = Depends(db.get_db),
+    current_user: User = Depends(get_current_user)
 ):
     """
     Поиск контактов по имени, фамилии или email.
-    Фильтрует контакты в базе данных и возвращает список совпадений.
+    Фильтрует контакты текущего пользователя и возвращает список совпадений.
+    Одинаковые одновременные запросы выполняют один запрос к базе данных.
     Возвращает ошибку, если контакты не найдены.
     """
-    query = db.query(Contact)
-    if name:
-        query = query.filter(Contact.first_name.ilike(f"%{name}%"))
-    if surname:
-        query = query.filter(Contact.last_name.ilike(f"%{surname}%"))
-    if email:
-        query = query.filter(Contact.email.ilike(f"%{email}%"))
-    
-    results = query.all()
+    results = coalescer.do(
+        current_user.id, "search_contacts", {"name": name, "surname": surname, "email": email},
+        lambda: [_to_schema(c) for c in crud.search_contacts(db, current_user.id, name=name, surname=surname, email=email)],
+    )
     if not results:
         raise HTTPException(status_code=404, detail="Contacts not found")
     return results
 
 @app.get("/contacts/upcoming-birthdays", response_model=List[Contact])
-def get_upcoming_birthdays(db: Session = Depends(db.get_db)):
+def get_upcoming_birthdays(db: Session = Depends(db.get_db), current_user: User = Depends(get_current_user)):
     """
     Возвращает список контактов с днями рождения, которые наступят в течение 7 дней.
+    Одинаковые одновременные запросы выполняют один запрос к базе данных.
     Если таких контактов нет, вызывает ошибку 404.
     """
-    today = datetime.today()
-    upcoming = today + timedelta(days=7)
-    
-    contacts = db.query(Contact).filter(
-        Contact.birthday.between(today, upcoming)
-    ).all()
+    today = datetime.today().date()
+    contacts = coalescer.do(
+        current_user.id, "upcoming_birthdays", {"today": today},
+        lambda: [_to_schema(c) for c in crud.get_upcoming_birthdays(db, current_user.id, today)],
+    )
     
     if not contacts:
         raise HTTPException(status_code=404, detail="No upcoming birthdays found")
     
     return contacts
 
+@app.get("/metrics/coalescing")
+def coalescing_metrics():
+    """
+    Возвращает статистику объединения одинаковых запросов на чтение:
+    количество выполненных и разделённых запросов и долю разделённых.
+    """
+    return coalescer.stats()
+
+def _to_schema(db_contact):
+    """
+    Преобразует ORM-объект контакта в схему, чтобы результат можно было
+    безопасно отдать нескольким запросам с разными сессиями.
+    """
+    return Contact.from_orm(db_contact) if db_contact is not None else None
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     """
     Получает информацию о текущем пользователе на основе токена.
@@ -198,15 +229,28 @@ def register_user(username: str, password: str, db: Session = Depends(get_db)):
     return {"message": "User registered successfully"}
 
 @router.post("/login")
-def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+def login_user(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """
     Аутентифицирует пользователя по имени и паролю.
     Генерирует JWT токены (доступа и обновления) для дальнейшей аутентификации.
+    Если для имени пользователя или IP-адреса превышен лимит неудачных попыток,
+    возвращает ошибку 429 до проверки пароля.
     Возвращает токены доступа и обновления, если аутентификация успешна.
     """
+    client_ip = request.client.host if request.client else None
+    retry_after = login_guard.retry_after(form_data.username, client_ip)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts",
+            headers={"Retry-After": str(int(retry_after) + 1)},
+        )
+
     user = db.query(User).filter(User.username == form_data.username).first()
     if not user or not verify_password(form_data.password, user.password):
+        login_guard.register_failure(form_data.username, client_ip)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    login_guard.reset(form_data.username, client_ip)
     
     access_token = create_access_token(data={"sub": str(user.id)}, expires_delta=timedelta(minutes=30))
     refresh_token = create_refresh_token(data={"sub": str(user.id)})
@@ -287,4 +331,21 @@ def upload_avatar(user_id: int, file: UploadFile = File(...), db: Session = Depe
     user.avatar_url = result.get("url")
     db.commit()
 
-    return {"avatar_url": user.avatar_url}
\ No newline at end of file
+    return {"avatar_url": user.avatar_url}
+
+@app.on_event("startup")
+async def start_birthday_digest_scheduler():
+    """
+    Запускает фоновый планировщик ежедневной рассылки дайджестов дней рождения.
+    Ссылка на задачу хранится в app.state, чтобы задачу не собрал сборщик мусора.
+    """
+    app.state.birthday_digest_task = asyncio.create_task(run_birthday_digest_scheduler())
+
+@app.on_event("shutdown")
+async def stop_birthday_digest_scheduler():
+    """
+    Останавливает планировщик рассылки дайджестов при завершении приложения.
+    """
+    task = getattr(app.state, "birthday_digest_task", None)
+    if task is not None:
+        task.cancel()
\ No newline at end of file
@@ -0,0 +1,39 @@
+from pathlib import Path
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+import db
+
+
+BASELINE_REVISION = "0001"
+ALEMBIC_INI = Path(__file__).parent / "alembic.ini"
+
+
+def migrate(engine: Optional[Engine] = None, config: Optional[Config] = None):
+    """
+    Приводит схему базы данных к последней ревизии.
+
+    База, созданная до перехода на миграции через Base.metadata.create_all,
+    уже содержит таблицы ревизии 0001, но не таблицу alembic_version.
+    Такая база помечается ревизией 0001 без её применения, после чего
+    применяются все последующие ревизии.
+
+    Args:
+        engine (Engine, optional): Подключение к базе данных. По умолчанию db.engine.
+        config (Config, optional): Конфигурация Alembic. По умолчанию из alembic.ini.
+    """
+    engine = engine or db.engine
+    config = config or Config(str(ALEMBIC_INI))
+    config.attributes["engine"] = engine
+    tables = inspect(engine).get_table_names()
+    if "alembic_version" not in tables and "users" in tables:
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
+
+
+if __name__ == "__main__":
+    migrate()
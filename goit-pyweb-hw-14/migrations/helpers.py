@@ -0,0 +1,93 @@
+from typing import List
+
+from alembic import context, op
+from sqlalchemy import text
+
+
+BACKFILL_BATCH_SIZE = 10_000
+
+
+def _is_postgresql() -> bool:
+    return op.get_context().dialect.name == "postgresql"
+
+
+def create_index_concurrently(name: str, table: str, columns: List[str], unique: bool = False):
+    """
+    Создаёт индекс без блокировки записи в таблицу (CREATE INDEX CONCURRENTLY).
+
+    На Postgres выполняется вне транзакции миграции. Если предыдущий запуск
+    прервался и оставил недействительный индекс, он удаляется и строится заново.
+    На других СУБД создаётся обычный индекс.
+
+    Args:
+        name (str): Имя индекса.
+        table (str): Имя таблицы.
+        columns (List[str]): Колонки индекса.
+        unique (bool, optional): Уникальный индекс. По умолчанию False.
+    """
+    if not _is_postgresql():
+        op.create_index(name, table, columns, unique=unique, if_not_exists=True)
+        return
+
+    with op.get_context().autocommit_block():
+        invalid = not context.is_offline_mode() and op.get_bind().execute(
+            text(
+                "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+                "WHERE c.relname = :name AND NOT i.indisvalid"
+            ),
+            {"name": name},
+        ).first()
+        if invalid:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+        op.create_index(
+            name, table, columns, unique=unique,
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def drop_index_concurrently(name: str, table: str):
+    """
+    Удаляет индекс без блокировки записи в таблицу (DROP INDEX CONCURRENTLY).
+
+    Args:
+        name (str): Имя индекса.
+        table (str): Имя таблицы.
+    """
+    if not _is_postgresql():
+        op.drop_index(name, table_name=table, if_exists=True)
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def backfill_in_batches(table: str, column: str, value: str, batch_size: int = BACKFILL_BATCH_SIZE):
+    """
+    Заполняет новую колонку пачками, фиксируя каждую пачку отдельно.
+
+    Обновляются только строки, где колонка ещё NULL, поэтому прерванное
+    заполнение можно безопасно запустить повторно. Каждая пачка блокирует
+    не больше batch_size строк и только на время своего UPDATE.
+
+    Пример для ревизии, добавляющей колонку::
+
+        op.add_column("contact", sa.Column("full_name", sa.String(), nullable=True))
+        backfill_in_batches(
+            "contact", "full_name",
+            "coalesce(first_name, '') || ' ' || coalesce(last_name, '')",
+        )
+
+    Args:
+        table (str): Имя таблицы с первичным ключом id.
+        column (str): Заполняемая колонка.
+        value (str): SQL-выражение для значения колонки. Не должно давать NULL,
+            иначе такие строки будут выбираться снова и заполнение не завершится.
+        batch_size (int, optional): Количество строк в пачке. По умолчанию 10000.
+    """
+    statement = text(
+        f"UPDATE {table} SET {column} = {value} "
+        f"WHERE id IN (SELECT id FROM {table} WHERE {column} IS NULL LIMIT :batch_size)"
+    )
+    with op.get_context().autocommit_block():
+        while op.get_bind().execute(statement, {"batch_size": batch_size}).rowcount:
+            pass
@@ -0,0 +1,54 @@
+"""initial schema
+
+Схема, которую раньше создавал Base.metadata.create_all при импорте:
+только таблицы users и contact. Существующие базы без alembic_version
+migrate.py помечает этой ревизией, не применяя её.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("hashed_password", sa.String(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("is_verified", sa.Boolean(), nullable=True),
+        sa.Column("avatar_url", sa.String(), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "contact",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("first_name", sa.String(), nullable=True),
+        sa.Column("last_name", sa.String(), nullable=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("phone", sa.String(), nullable=True),
+        sa.Column("birthday", sa.Date(), nullable=True),
+        sa.Column("additional_info", sa.String(), nullable=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+    )
+    op.create_index("ix_contact_id", "contact", ["id"])
+    op.create_index("ix_contact_first_name", "contact", ["first_name"])
+    op.create_index("ix_contact_last_name", "contact", ["last_name"])
+    op.create_index("ix_contact_email", "contact", ["email"], unique=True)
+    op.create_index("ix_contact_phone", "contact", ["phone"])
+
+
+def downgrade():
+    op.drop_table("contact")
+    op.drop_table("users")
@@ -0,0 +1,27 @@
+"""contact user indexes
+
+Составные индексы для запросов контактов пользователя: выборка по
+(user_id, id) и поиск/сортировка по (user_id, last_name). Строятся
+конкурентно, чтобы не блокировать запись в contact.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:00
+"""
+from migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    create_index_concurrently("ix_contact_user_id_id", "contact", ["user_id", "id"])
+    create_index_concurrently("ix_contact_user_id_last_name", "contact", ["user_id", "last_name"])
+
+
+def downgrade():
+    drop_index_concurrently("ix_contact_user_id_last_name", "contact")
+    drop_index_concurrently("ix_contact_user_id_id", "contact")
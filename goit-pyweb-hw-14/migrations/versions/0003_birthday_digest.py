@@ -0,0 +1,35 @@
+"""birthday digest
+
+Таблица отметок об отправленных дайджестах дней рождения (см. scheduler.py).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:00
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Таблица могла быть создана через create_all до перехода на миграции.
+    if not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table("birthday_digest"):
+        return
+    op.create_table(
+        "birthday_digest",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("sent_on", sa.Date(), nullable=False),
+        sa.UniqueConstraint("user_id", "sent_on", name="uq_birthday_digest_user_day"),
+    )
+    op.create_index("ix_birthday_digest_id", "birthday_digest", ["id"])
+    op.create_index("ix_birthday_digest_sent_on", "birthday_digest", ["sent_on"])
+
+
+def downgrade():
+    op.drop_table("birthday_digest")
@@ -0,0 +1,251 @@
+import asyncio
+import logging
+from datetime import date, datetime, time, timedelta
+from itertools import groupby, islice
+from typing import Iterator, List, Optional, Tuple
+
+from fastapi_mail import FastMail, MessageSchema, MessageType
+from sqlalchemy import and_, extract, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import db
+from crud import upcoming_month_days
+from mail import conf
+from models import BirthdayDigest, Contact, User
+
+
+logger = logging.getLogger(__name__)
+
+DIGEST_DAYS_AHEAD = 7
+DIGEST_SEND_AT = time(hour=8, minute=0)
+DIGEST_BATCH_SIZE = 50
+DIGEST_BATCH_INTERVAL = 1.0
+DIGEST_FETCH_SIZE = 1000
+DIGEST_TEMPLATE = "birthday_digest.html"
+
+
+def get_upcoming_birthdays_by_user(
+    db: Session, today: date, days: int = DIGEST_DAYS_AHEAD, fetch_size: int = DIGEST_FETCH_SIZE
+) -> Iterator[Tuple[User, List[Contact]]]:
+    """
+    Находит ближайшие дни рождения контактов всех пользователей одним запросом.
+
+    Пользователи без email и те, кому дайджест за сегодня уже отправлен,
+    исключаются на стороне базы данных. Строки читаются порциями
+    по fetch_size, поэтому в памяти не держится весь результат.
+
+    Args:
+        db (Session): Сессия базы данных.
+        today (date): Дата отправки дайджеста.
+        days (int, optional): Количество дней в окне. По умолчанию 7.
+        fetch_size (int, optional): Количество строк в одной порции. По умолчанию 1000.
+
+    Yields:
+        Tuple[User, List[Contact]]: Пользователь и его контакты с ближайшими днями рождения.
+    """
+    rows = (
+        db.query(User, Contact)
+        .join(Contact, Contact.user_id == User.id)
+        .outerjoin(BirthdayDigest, and_(BirthdayDigest.user_id == User.id, BirthdayDigest.sent_on == today))
+        .filter(
+            User.is_active.is_(True),
+            User.email.isnot(None),
+            BirthdayDigest.id.is_(None),
+            tuple_(extract("month", Contact.birthday), extract("day", Contact.birthday)).in_(
+                upcoming_month_days(today, days)
+            ),
+        )
+        .order_by(User.id)
+        .yield_per(fetch_size)
+    )
+    for user, group in groupby(rows, key=lambda row: row[0]):
+        yield user, [contact for _, contact in group]
+
+
+def _next_birthday(birthday: date, today: date) -> date:
+    for year in (today.year, today.year + 1):
+        try:
+            candidate = birthday.replace(year=year)
+        except ValueError:
+            candidate = date(year, 2, 28)
+        if candidate >= today:
+            return candidate
+    return candidate
+
+
+def build_digest_message(user: User, contacts: List[Contact], today: date) -> MessageSchema:
+    """
+    Формирует письмо-дайджест с ближайшими днями рождения для пользователя.
+
+    Args:
+        user (User): Получатель дайджеста.
+        contacts (List[Contact]): Контакты с ближайшими днями рождения.
+        today (date): Дата отправки дайджеста.
+
+    Returns:
+        MessageSchema: Письмо, готовое к отправке через FastMail.
+    """
+    birthdays = []
+    for contact in contacts:
+        next_birthday = _next_birthday(contact.birthday, today)
+        birthdays.append({
+            "first_name": contact.first_name,
+            "last_name": contact.last_name,
+            "date": next_birthday.strftime("%d.%m"),
+            "days_left": (next_birthday - today).days,
+        })
+    birthdays.sort(key=lambda item: item["days_left"])
+    return MessageSchema(
+        subject="Upcoming birthdays",
+        recipients=[user.email],
+        template_body={"email": user.email, "birthdays": birthdays},
+        subtype=MessageType.html,
+    )
+
+
+def _claim_batch(digests, claims: Session, today: date, batch_size: int):
+    """
+    Берёт из потока следующую пачку дайджестов и закрепляет её за текущим запуском.
+
+    Для каждого пользователя строка birthday_digest вставляется и фиксируется
+    до отправки письма. Если строку уже вставил другой запуск (другой воркер
+    или реплика), уникальный ключ (user_id, sent_on) не даст вставить её
+    повторно, и пользователь пропускается.
+
+    Returns:
+        Tuple[List[Tuple[User, List[Contact]]], bool]: Закреплённые дайджесты
+        и признак того, что поток ещё не исчерпан.
+    """
+    batch = list(islice(digests, batch_size))
+    claimed = []
+    for user, contacts in batch:
+        try:
+            with claims.begin_nested():
+                claims.add(BirthdayDigest(user_id=user.id, sent_on=today))
+            claimed.append((user, contacts))
+        except IntegrityError:
+            logger.info("Birthday digest for user %s already claimed", user.id)
+    claims.commit()
+    return claimed, len(batch) == batch_size
+
+
+def _release_claims(claims: Session, user_ids: List[int], today: date):
+    """
+    Снимает закрепление с пользователей, которым письмо отправить не удалось,
+    чтобы следующий запуск за этот день попробовал ещё раз.
+    """
+    claims.query(BirthdayDigest).filter(
+        BirthdayDigest.user_id.in_(user_ids), BirthdayDigest.sent_on == today
+    ).delete(synchronize_session=False)
+    claims.commit()
+
+
+async def send_birthday_digests(
+    db: Session,
+    fm: Optional[FastMail] = None,
+    today: Optional[date] = None,
+    days: int = DIGEST_DAYS_AHEAD,
+    batch_size: int = DIGEST_BATCH_SIZE,
+    batch_interval: float = DIGEST_BATCH_INTERVAL,
+) -> int:
+    """
+    Рассылает дайджесты ближайших дней рождения всем пользователям.
+
+    Письма отправляются пачками по batch_size с паузой batch_interval секунд
+    между ними. Перед отправкой каждая пачка закрепляется в таблице
+    birthday_digest, поэтому одновременные запуски в нескольких воркерах
+    не отправляют письма дважды, а запуск после перезапуска продолжает
+    с тех пользователей, кто письмо ещё не получил. Неудачные отправки
+    открепляются. Запросы к базе данных выполняются в отдельном потоке,
+    чтобы не блокировать цикл событий.
+
+    Args:
+        db (Session): Сессия базы данных.
+        fm (FastMail, optional): Клиент почты. По умолчанию создаётся из mail.conf.
+        today (date, optional): Дата отправки. По умолчанию текущая дата.
+        days (int, optional): Количество дней в окне. По умолчанию 7.
+        batch_size (int, optional): Размер пачки писем. По умолчанию 50.
+        batch_interval (float, optional): Пауза между пачками в секундах. По умолчанию 1.0.
+
+    Returns:
+        int: Количество отправленных дайджестов.
+    """
+    fm = fm or FastMail(conf)
+    today = today or date.today()
+
+    async def send(user, contacts):
+        message = build_digest_message(user, contacts, today)
+        await fm.send_message(message, template_name=DIGEST_TEMPLATE)
+
+    digests = get_upcoming_birthdays_by_user(db, today, days)
+    claims = Session(bind=db.get_bind())
+    sent = 0
+
+    try:
+        more = True
+        first = True
+        while more:
+            batch, more = await asyncio.to_thread(_claim_batch, digests, claims, today, batch_size)
+            if not batch:
+                continue
+            if not first:
+                await asyncio.sleep(batch_interval)
+            first = False
+            results = await asyncio.gather(
+                *(send(user, contacts) for user, contacts in batch),
+                return_exceptions=True,
+            )
+            failed = []
+            for (user, _), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    logger.warning("Birthday digest for user %s failed: %s", user.id, result)
+                    failed.append(user.id)
+                else:
+                    sent += 1
+            if failed:
+                await asyncio.to_thread(_release_claims, claims, failed, today)
+    finally:
+        claims.close()
+
+    return sent
+
+
+def _seconds_until(send_at: time) -> float:
+    now = datetime.now()
+    next_run = datetime.combine(now.date(), send_at)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+
+async def _run_once():
+    session = db.SessionLocal()
+    try:
+        sent = await send_birthday_digests(session)
+        logger.info("Birthday digests sent: %s", sent)
+    except Exception:
+        logger.exception("Birthday digest run failed")
+        session.rollback()
+    finally:
+        session.close()
+
+
+async def run_birthday_digest_scheduler(send_at: time = DIGEST_SEND_AT):
+    """
+    Ежедневно запускает рассылку дайджестов в указанное время.
+
+    Предназначена для запуска фоновой задачей при старте приложения.
+    Если приложение запущено уже после send_at, рассылка за сегодня
+    выполняется сразу: пользователи, получившие письмо до перезапуска,
+    пропускаются. Ошибка одной рассылки логируется и не останавливает
+    планировщик.
+
+    Args:
+        send_at (time, optional): Время ежедневной рассылки. По умолчанию 08:00.
+    """
+    if datetime.now().time() >= send_at:
+        await _run_once()
+    while True:
+        await asyncio.sleep(_seconds_until(send_at))
+        await _run_once()
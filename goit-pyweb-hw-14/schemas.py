@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, conlist
+from typing import List, Optional
 from datetime import date
 
 class ContactCreate(BaseModel):
@@ -35,3 +35,13 @@ class ContactUpdate(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+MAX_BATCH_IDS = 5000
+
+class ContactBatchRequest(BaseModel):
+    ids: conlist(int, min_items=1, max_items=MAX_BATCH_IDS)
+
+class ContactBatchResponse(BaseModel):
+    contacts: List[Contact]
+    missing: List[int]
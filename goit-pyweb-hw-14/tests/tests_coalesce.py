@@ -0,0 +1,66 @@
+import threading
+import time
+
+from coalesce import SingleFlight, normalize_params
+
+
+def test_single_flight_shares_concurrent_calls():
+    flight = SingleFlight(wait_timeout=2)
+    calls = []
+    started = threading.Event()
+
+    def query():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return ["result"]
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do(1, "search", {"name": "John"}, query)))
+    leader.start()
+    started.wait()
+    followers = [
+        threading.Thread(target=lambda: results.append(flight.do(1, "search", {"name": "John", "email": None}, query)))
+        for _ in range(4)
+    ]
+    for t in followers:
+        t.start()
+    for t in [leader] + followers:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [["result"]] * 5
+    assert flight.stats()["share_ratio"] == 0.8
+
+
+def test_single_flight_does_not_share_between_users():
+    flight = SingleFlight()
+    assert flight.do(1, "read_contact", {"contact_id": 1}, lambda: "first") == "first"
+    assert flight.do(2, "read_contact", {"contact_id": 1}, lambda: "second") == "second"
+    assert flight.stats()["shared"] == 0
+
+
+def test_single_flight_does_not_share_different_values():
+    flight = SingleFlight(wait_timeout=2)
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_query():
+        started.set()
+        release.wait(2)
+        return ["John"]
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do(1, "search", {"name": "John"}, slow_query)))
+    leader.start()
+    started.wait()
+    assert flight.do(1, "search", {"name": " John "}, lambda: []) == []
+    release.set()
+    leader.join()
+    assert results == [["John"]]
+    assert flight.stats()["shared"] == 0
+
+
+def test_normalize_params_ignores_order_and_none():
+    assert normalize_params({"surname": "Doe", "name": None, "email": "a"}) == (("email", "a"), ("surname", "Doe"))
+    assert normalize_params({"name": " John "}) != normalize_params({"name": "John"})
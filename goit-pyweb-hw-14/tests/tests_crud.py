@@ -0,0 +1,71 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import crud
+from models import Base, Contact, User
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"id": user_id, "email": f"user{user_id}@example.com"} for user_id in (1, 2)
+        ])
+        conn.execute(Contact.__table__.insert(), [
+            {
+                "id": contact_id,
+                "first_name": f"Name{contact_id}",
+                "last_name": "Doe",
+                "email": f"contact{contact_id}@example.com",
+                "phone": "1234567890",
+                "birthday": date(1990, 1, 1),
+                "user_id": 1 if contact_id <= 20 else 2,
+            }
+            for contact_id in range(1, 26)
+        ])
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def count_queries(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_get_contacts_by_ids_keeps_request_order_across_chunks(db):
+    ids = [17, 3, 12, 1, 20, 8, 5]
+    contacts, missing = crud.get_contacts_by_ids(db, ids, user_id=1, chunk_size=3)
+    assert [contact.id for contact in contacts] == ids
+    assert missing == []
+
+
+def test_get_contacts_by_ids_collapses_duplicates(db):
+    contacts, missing = crud.get_contacts_by_ids(db, [4, 9, 4, 9, 2], user_id=1, chunk_size=2)
+    assert [contact.id for contact in contacts] == [4, 9, 2]
+    assert missing == []
+
+
+def test_get_contacts_by_ids_reports_other_users_ids_as_missing(db):
+    contacts, missing = crud.get_contacts_by_ids(db, [21, 2, 999, 22, 3], user_id=1, chunk_size=2)
+    assert [contact.id for contact in contacts] == [2, 3]
+    assert missing == [21, 999, 22]
+
+
+def test_get_contacts_by_ids_runs_one_query_per_chunk(engine, db):
+    statements = count_queries(engine)
+    ids = list(range(20, 0, -1)) + [20, 1]
+    crud.get_contacts_by_ids(db, ids, user_id=1, chunk_size=6)
+    assert len(statements) == 4
@@ -0,0 +1,163 @@
+from collections import OrderedDict
+
+from login_guard import LoginAttemptTracker, RedisLoginAttemptTracker, backoff_delay
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    """
+    Минимальная замена клиента Redis для команд, которые использует трекер.
+    Время истечения ключей берётся из FakeClock.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.values = {}
+        self.expires = {}
+
+    def _alive(self, key):
+        if key in self.expires and self.expires[key] <= self.clock():
+            self.values.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.values
+
+    def incr(self, key):
+        self.values[key] = int(self.values[key]) + 1 if self._alive(key) else 1
+        return self.values[key]
+
+    def expire(self, key, seconds):
+        self.expires[key] = self.clock() + seconds
+
+    def set(self, key, value, px=None):
+        self.values[key] = value
+        if px is not None:
+            self.expires[key] = self.clock() + px / 1000
+
+    def pttl(self, key):
+        if not self._alive(key):
+            return -2
+        if key not in self.expires:
+            return -1
+        return int((self.expires[key] - self.clock()) * 1000)
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+            self.expires.pop(key, None)
+
+    def pipeline(self):
+        redis = self
+
+        class Pipeline:
+            def __init__(self):
+                self.calls = []
+
+            def incr(self, key):
+                self.calls.append(lambda: redis.incr(key))
+
+            def expire(self, key, seconds):
+                self.calls.append(lambda: redis.expire(key, seconds))
+
+            def execute(self):
+                return [call() for call in self.calls]
+
+        return Pipeline()
+
+
+def test_login_guard_blocks_after_threshold():
+    tracker = LoginAttemptTracker(username_threshold=3)
+    for _ in range(2):
+        tracker.register_failure("victim", "10.0.0.1")
+    assert tracker.retry_after("victim", "10.0.0.1") == 0
+    tracker.register_failure("Victim ", "10.0.0.2")
+    assert tracker.retry_after("victim", "10.0.0.3") > 0
+    tracker.reset("victim", "10.0.0.1")
+    assert tracker.retry_after("victim", "10.0.0.3") == 0
+
+
+def test_login_guard_backoff_and_bounded_memory():
+    assert [backoff_delay(n, 3) for n in (2, 3, 4, 5)] == [0, 1, 2, 4]
+    assert backoff_delay(100, 3) == 15 * 60
+    tracker = LoginAttemptTracker(max_entries=10)
+    for i in range(50):
+        tracker.register_failure(f"user{i}", None)
+    assert len(tracker) == 10
+
+
+def test_login_guard_eviction_keeps_blocked_keys():
+    clock = FakeClock()
+    tracker = LoginAttemptTracker(username_threshold=3, max_entries=100, clock=clock)
+    for _ in range(3):
+        tracker.register_failure("victim", None)
+    assert tracker.retry_after("victim", None) > 0
+    for i in range(1000):
+        tracker.register_failure(f"throwaway{i}", None)
+        tracker.retry_after("victim", None)
+    assert tracker.retry_after("victim", None) > 0
+
+
+class CountingOrderedDict(OrderedDict):
+    """
+    OrderedDict, который считает перестановки и вытеснения записей.
+    """
+
+    operations = 0
+
+    def popitem(self, last=True):
+        CountingOrderedDict.operations += 1
+        return super().popitem(last)
+
+    def move_to_end(self, key, last=True):
+        CountingOrderedDict.operations += 1
+        return super().move_to_end(key, last)
+
+
+def test_login_guard_eviction_is_constant_when_all_keys_blocked():
+    clock = FakeClock()
+    tracker = LoginAttemptTracker(username_threshold=1, max_entries=1000, clock=clock)
+    tracker._open = CountingOrderedDict()
+    tracker._blocked = CountingOrderedDict()
+    for i in range(1000):
+        tracker.register_failure(f"user{i}", None)
+    assert len(tracker._blocked) == 1000
+
+    CountingOrderedDict.operations = 0
+    for i in range(100):
+        tracker.register_failure(f"attacker{i}", None)
+    assert len(tracker) == 1000
+    assert CountingOrderedDict.operations <= 100
+
+
+def test_login_guard_block_expires():
+    clock = FakeClock()
+    tracker = LoginAttemptTracker(username_threshold=2, clock=clock)
+    tracker.register_failure("victim", None)
+    tracker.register_failure("victim", None)
+    assert tracker.retry_after("victim", None) == 1
+    clock.now = 1.5
+    assert tracker.retry_after("victim", None) == 0
+
+
+def test_redis_login_guard_shares_blocks_between_nodes():
+    clock = FakeClock()
+    redis = FakeRedis(clock)
+    first = RedisLoginAttemptTracker(redis, username_threshold=3)
+    second = RedisLoginAttemptTracker(redis, username_threshold=3)
+    for tracker in (first, second, first):
+        tracker.register_failure("victim", "10.0.0.1")
+    assert second.retry_after("Victim", "10.0.0.2") == 1
+
+    clock.now = 1.5
+    assert first.retry_after("victim", "10.0.0.2") == 0
+    second.register_failure("victim", "10.0.0.2")
+    assert first.retry_after("victim", "10.0.0.2") == 2
+
+    first.reset("victim", "10.0.0.1")
+    assert second.retry_after("victim", "10.0.0.3") == 0
@@ -0,0 +1,144 @@
+import os
+from datetime import date
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, event, inspect, text
+
+import migrate
+from models import Base, Contact, User
+
+
+MIGRATIONS = Path(migrate.__file__).parent / "migrations"
+
+# Временная ревизия поверх head: добавляет колонку, заполняет её пачками
+# по две строки и строит по ней индекс.
+BACKFILL_REVISION = '''
+import sqlalchemy as sa
+from alembic import op
+
+from migrations.helpers import backfill_in_batches, create_index_concurrently, drop_index_concurrently
+
+
+revision = "9999"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("contact", sa.Column("full_name", sa.String(), nullable=True))
+    backfill_in_batches("contact", "full_name", "first_name || ' ' || last_name", batch_size=2)
+    create_index_concurrently("ix_contact_full_name", "contact", ["full_name"])
+
+
+def downgrade():
+    drop_index_concurrently("ix_contact_full_name", "contact")
+    op.drop_column("contact", "full_name")
+'''
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def backfill_revision(tmp_path):
+    versions = tmp_path / "versions"
+    versions.mkdir()
+    (versions / "9999_contact_full_name.py").write_text(BACKFILL_REVISION)
+    return versions
+
+
+def alembic_config(*extra_versions):
+    config = Config(str(migrate.ALEMBIC_INI))
+    config.set_main_option("script_location", str(MIGRATIONS))
+    config.set_main_option("version_path_separator", "os")
+    config.set_main_option(
+        "version_locations", os.pathsep.join(str(path) for path in (MIGRATIONS / "versions", *extra_versions))
+    )
+    return config
+
+
+def seed(engine):
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{"id": 1, "email": "user@example.com"}])
+        conn.execute(Contact.__table__.insert(), [
+            {
+                "id": contact_id,
+                "first_name": f"Name{contact_id}",
+                "last_name": "Doe",
+                "email": f"contact{contact_id}@example.com",
+                "phone": "1234567890",
+                "birthday": date(1990, 1, 1),
+                "user_id": 1,
+            }
+            for contact_id in range(1, 6)
+        ])
+
+
+def count_updates(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("UPDATE CONTACT"):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def current_revision(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+
+def contact_indexes(engine):
+    return {index["name"] for index in inspect(engine).get_indexes("contact")}
+
+
+def test_migrate_backfills_new_column_once(engine, backfill_revision):
+    migrate.migrate(engine, alembic_config())
+    assert current_revision(engine) == "0003"
+    seed(engine)
+
+    updates = count_updates(engine)
+    migrate.migrate(engine, alembic_config(backfill_revision))
+    assert current_revision(engine) == "9999"
+    assert len(updates) == 4
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, full_name FROM contact ORDER BY id")).fetchall()
+    assert rows == [(contact_id, f"Name{contact_id} Doe") for contact_id in range(1, 6)]
+    assert "ix_contact_full_name" in contact_indexes(engine)
+
+    updates.clear()
+    migrate.migrate(engine, alembic_config(backfill_revision))
+    assert updates == []
+    assert current_revision(engine) == "9999"
+
+
+def test_downgrade_drops_index_and_column(engine, backfill_revision):
+    config = alembic_config(backfill_revision)
+    migrate.migrate(engine, config)
+    seed(engine)
+
+    command.downgrade(config, "0001")
+    assert current_revision(engine) == "0001"
+    columns = {column["name"] for column in inspect(engine).get_columns("contact")}
+    assert "full_name" not in columns
+    assert not {"ix_contact_full_name", "ix_contact_user_id_id", "ix_contact_user_id_last_name"} & contact_indexes(engine)
+
+
+def test_migrate_stamps_database_created_without_migrations(engine):
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, Contact.__table__])
+    seed(engine)
+
+    migrate.migrate(engine, alembic_config())
+    assert current_revision(engine) == "0003"
+    assert "birthday_digest" in inspect(engine).get_table_names()
+    assert {"ix_contact_user_id_id", "ix_contact_user_id_last_name"} <= contact_indexes(engine)
@@ -47,3 +47,11 @@ def test_get_all_contacts(client, auth):
     response = client.get("/contacts/", headers=headers)
     assert response.status_code == 200
     assert isinstance(response.json(), list)
+
+def test_read_contacts_batch(client, auth):
+    headers = {"Authorization": f"Bearer {auth}"}
+    response = client.post("/contacts/batch", headers=headers, json={"ids": [999999, 1]})
+    assert response.status_code == 200
+    data = response.json()
+    assert [c["id"] for c in data["contacts"]] == [1]
+    assert data["missing"] == [999999]
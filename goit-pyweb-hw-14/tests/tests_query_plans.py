@@ -0,0 +1,229 @@
+import json
+import os
+import re
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import crud
+from crud import upcoming_month_days
+from models import Base, Contact, User
+from scheduler import get_upcoming_birthdays_by_user
+from schemas import Contact as ContactSchema
+
+
+# По умолчанию планы проверяются на SQLite в памяти. Для проверки на Postgres
+# (включая оценку стоимости) укажите QUERY_PLAN_DATABASE_URL на пустую тестовую базу.
+QUERY_PLAN_DATABASE_URL = os.getenv("QUERY_PLAN_DATABASE_URL", "sqlite://")
+
+# Базовые оценки стоимости запросов на Postgres. Файл обновляется только
+# при UPDATE_QUERY_PLAN_COSTS=1; для запросов без базовой оценки действует
+# общий потолок COST_CEILING, который ниже стоимости полного прохода по contact
+# на тестовых данных.
+COST_BASELINES_PATH = Path(__file__).parent / "query_plan_costs.json"
+UPDATE_COST_BASELINES = bool(os.getenv("UPDATE_QUERY_PLAN_COSTS"))
+COST_TOLERANCE = 1.5
+COST_CEILING = 1000.0
+
+USERS = 100
+CONTACTS_PER_USER = 500
+TODAY = date(2024, 6, 10)
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine(QUERY_PLAN_DATABASE_URL)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"id": user_id, "email": f"user{user_id}@example.com", "is_active": True}
+            for user_id in range(1, USERS + 1)
+        ])
+        conn.execute(Contact.__table__.insert(), [
+            {
+                "id": (user_id - 1) * CONTACTS_PER_USER + n + 1,
+                "first_name": f"Name{n}",
+                "last_name": f"Surname{n % 50}",
+                "email": f"contact{user_id}_{n}@example.com",
+                "phone": f"+380{user_id:03d}{n:06d}",
+                "birthday": date(1990, 1, 1) + timedelta(days=user_id * 7 + n * 13),
+                "user_id": user_id,
+            }
+            for user_id in range(1, USERS + 1)
+            for n in range(CONTACTS_PER_USER)
+        ])
+        conn.exec_driver_sql("ANALYZE")
+
+    yield engine
+
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def session(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@contextmanager
+def capture_queries(engine):
+    """
+    Собирает все SQL-запросы, выполненные через engine внутри блока.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def explain(engine, statement, parameters):
+    """
+    Возвращает план запроса: строки плана и оценку стоимости (только для Postgres).
+    """
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            raw = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+            nodes, stack = [], [plan]
+            while stack:
+                node = stack.pop()
+                nodes.append(node)
+                stack.extend(node.get("Plans", []))
+            lines = [
+                f"{node['Node Type']} {node.get('Relation Name', '')} {node.get('Index Name', '')}".strip()
+                for node in nodes
+            ]
+            return lines, plan["Total Cost"]
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+        return [row[-1] for row in rows], None
+
+
+def is_contact_seq_scan(line):
+    return bool(
+        re.match(r"^SCAN (TABLE )?contact\b(?!.*USING)", line)
+        or re.match(r"^Seq Scan contact\b", line)
+    )
+
+
+@pytest.fixture(scope="module")
+def cost_baselines():
+    baselines = {}
+    if COST_BASELINES_PATH.exists():
+        baselines = json.loads(COST_BASELINES_PATH.read_text())
+    recorded = {}
+    yield baselines, recorded
+    if UPDATE_COST_BASELINES and recorded:
+        baselines.update(recorded)
+        COST_BASELINES_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+
+
+def serialize(result):
+    """
+    Повторяет сериализацию ответа FastAPI, чтобы ленивые загрузки
+    попали в подсчёт запросов.
+    """
+    if isinstance(result, tuple):
+        result = result[0]
+    if not isinstance(result, list):
+        result = [result]
+    return [ContactSchema.from_orm(item) for item in result if isinstance(item, Contact)]
+
+
+def current_user(db):
+    """
+    Запрос пользователя, который get_current_user выполняет для каждого эндпоинта.
+    """
+    return db.query(User).filter(User.id == 2).first()
+
+
+BATCH_IDS = list(range(CONTACTS_PER_USER * 2, CONTACTS_PER_USER + 1, -5))
+
+# Доступ к данным каждого эндпоинта main.py: аутентификация, запрос crud
+# и сериализация ответа. main.py нельзя импортировать в тестах (импортирует
+# сам себя, при импорте подключается к Redis), поэтому маршруты воспроизводятся
+# вызовами тех же функций. Значение: (вызов, бюджет запросов).
+ENDPOINTS = {
+    "GET /contacts/{contact_id}": (
+        lambda db: crud.get_contact(db, contact_id=CONTACTS_PER_USER + 7, user_id=current_user(db).id), 2),
+    "GET /contacts/": (
+        lambda db: crud.get_contacts(db, user_id=current_user(db).id, skip=20, limit=10), 2),
+    "POST /contacts/batch": (
+        lambda db: crud.get_contacts_by_ids(db, BATCH_IDS, user_id=current_user(db).id), 2),
+    "GET /contacts/search": (
+        lambda db: crud.search_contacts(db, user_id=current_user(db).id, surname="Surname1"), 2),
+    "GET /contacts/upcoming-birthdays": (
+        lambda db: crud.get_upcoming_birthdays(db, user_id=current_user(db).id, today=TODAY), 2),
+    "GET /verify/{token}": (lambda db: current_user(db), 1),
+}
+
+def user_contacts(db):
+    user = current_user(db)
+    return [(contact.first_name, contact.user.email) for contact in user.contacts]
+
+
+# Обход связей Contact.user и User.contacts. Загрузка по строке (N+1)
+# превысит бюджет: у всех контактов один владелец, его достаточно загрузить один раз.
+RELATIONSHIPS = {
+    "Contact.user": (
+        lambda db: [contact.user.email for contact in db.query(Contact).filter(Contact.user_id == 2).limit(50)], 2),
+    "User.contacts": (user_contacts, 2),
+}
+
+CASES = {**ENDPOINTS, **RELATIONSHIPS}
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_query_plan_uses_index(engine, session, cost_baselines, name):
+    call, _ = CASES[name]
+    baselines, recorded = cost_baselines
+    with capture_queries(engine) as statements:
+        call(session)
+
+    for number, (statement, parameters) in enumerate(statements):
+        lines, cost = explain(engine, statement, parameters)
+        assert not any(is_contact_seq_scan(line) for line in lines), f"{name}: {lines}"
+        if cost is None:
+            continue
+        key = f"{name} #{number}"
+        if UPDATE_COST_BASELINES:
+            recorded[key] = cost
+            continue
+        limit = baselines[key] * COST_TOLERANCE if key in baselines else COST_CEILING
+        assert cost <= limit, f"{key}: cost {cost} > {limit} (baseline {baselines.get(key)})"
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_query_count_budget(engine, session, name):
+    call, budget = CASES[name]
+    with capture_queries(engine) as statements:
+        serialize(call(session))
+    assert len(statements) <= budget, [statement for statement, _ in statements]
+
+
+def test_birthday_digest_is_single_query(engine, session):
+    users = 0
+    with capture_queries(engine) as statements:
+        for user, contacts in get_upcoming_birthdays_by_user(session, TODAY):
+            serialize(contacts)
+            assert user.email
+            users += 1
+    assert len(statements) == 1
+    assert users > 0
+
+
+def test_upcoming_birthdays_ignore_birth_year(session):
+    contacts = crud.get_upcoming_birthdays(session, user_id=2, today=TODAY)
+    window = set(upcoming_month_days(TODAY))
+    assert contacts
+    assert all((c.birthday.month, c.birthday.day) in window for c in contacts)
+    assert all(c.birthday.year < TODAY.year for c in contacts)
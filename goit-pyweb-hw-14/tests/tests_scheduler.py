@@ -0,0 +1,152 @@
+import asyncio
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, BirthdayDigest, Contact, User
+import scheduler
+from scheduler import send_birthday_digests, upcoming_month_days
+
+
+TODAY = date(2024, 6, 10)
+
+
+class FakeMail:
+    """
+    Заменяет FastMail: запоминает получателей, считает одновременные отправки
+    и падает для адресов из failing.
+    """
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.recipients = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def send_message(self, message, template_name=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0)
+        self.in_flight -= 1
+        recipient = message.recipients[0]
+        if recipient in self.failing:
+            raise ConnectionError("SMTP unavailable")
+        self.recipients.append(recipient)
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'digest.db'}")
+
+    @event.listens_for(engine, "connect")
+    def enable_wal(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"id": user_id, "email": f"user{user_id}@example.com", "is_active": True}
+            for user_id in range(1, 6)
+        ])
+        conn.execute(Contact.__table__.insert(), [
+            {
+                "first_name": f"Friend{user_id}",
+                "last_name": "Doe",
+                "email": f"friend{user_id}@example.com",
+                "phone": "1234567890",
+                "birthday": date(1990, TODAY.month, TODAY.day + 1),
+                "user_id": user_id,
+            }
+            for user_id in range(1, 6)
+        ])
+    Session = sessionmaker(bind=engine)
+    yield Session
+    engine.dispose()
+
+
+def sent_user_ids(Session):
+    with Session() as db:
+        return sorted(row.user_id for row in db.query(BirthdayDigest).filter(BirthdayDigest.sent_on == TODAY))
+
+
+def run(Session, fm, **kwargs):
+    with Session() as db:
+        return asyncio.run(send_birthday_digests(db, fm=fm, today=TODAY, batch_interval=0, **kwargs))
+
+
+def test_upcoming_month_days_wraps_year():
+    pairs = upcoming_month_days(date(2023, 12, 29), days=3)
+    assert pairs == [(12, 29), (12, 30), (12, 31), (1, 1)]
+
+
+def test_upcoming_month_days_includes_leap_day():
+    pairs = upcoming_month_days(date(2023, 2, 27), days=1)
+    assert (2, 29) in pairs
+
+
+def test_send_birthday_digests_in_batches(sessions):
+    fm = FakeMail()
+    assert run(sessions, fm, batch_size=2) == 5
+    assert fm.max_in_flight == 2
+    assert sorted(fm.recipients) == [f"user{user_id}@example.com" for user_id in range(1, 6)]
+    assert sent_user_ids(sessions) == [1, 2, 3, 4, 5]
+
+
+def test_failed_digest_is_released_and_retried(sessions):
+    assert run(sessions, FakeMail(failing={"user2@example.com"})) == 4
+    assert sent_user_ids(sessions) == [1, 3, 4, 5]
+
+    retry = FakeMail()
+    assert run(sessions, retry) == 1
+    assert retry.recipients == ["user2@example.com"]
+
+
+def test_already_sent_users_are_skipped(sessions):
+    with sessions() as db:
+        db.add(BirthdayDigest(user_id=1, sent_on=TODAY))
+        db.commit()
+
+    fm = FakeMail()
+    assert run(sessions, fm) == 4
+    assert "user1@example.com" not in fm.recipients
+
+
+def test_concurrent_runs_send_each_digest_once(sessions):
+    fm = FakeMail()
+
+    async def both():
+        with sessions() as first, sessions() as second:
+            return await asyncio.gather(
+                send_birthday_digests(first, fm=fm, today=TODAY, batch_size=1, batch_interval=0),
+                send_birthday_digests(second, fm=fm, today=TODAY, batch_size=1, batch_interval=0),
+            )
+
+    assert sum(asyncio.run(both())) == 5
+    assert sorted(fm.recipients) == [f"user{user_id}@example.com" for user_id in range(1, 6)]
+
+
+def test_users_without_email_are_skipped(sessions):
+    with sessions() as db:
+        db.query(User).filter(User.id == 3).update({"email": None})
+        db.commit()
+
+    fm = FakeMail()
+    assert run(sessions, fm) == 4
+    assert sent_user_ids(sessions) == [1, 2, 4, 5]
+
+
+def test_message_build_failure_releases_only_that_user(sessions, monkeypatch):
+    build = scheduler.build_digest_message
+
+    def failing_build(user, contacts, today):
+        if user.id == 2:
+            raise ValueError("invalid message")
+        return build(user, contacts, today)
+
+    monkeypatch.setattr(scheduler, "build_digest_message", failing_build)
+    fm = FakeMail()
+    assert run(sessions, fm, batch_size=5) == 4
+    assert "user2@example.com" not in fm.recipients
+    assert sent_user_ids(sessions) == [1, 3, 4, 5]